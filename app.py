@@ -1,4 +1,5 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
@@ -6,22 +7,104 @@ from datetime import datetime, timedelta
 from textblob import TextBlob
 import re
 import time
-from urllib.parse import quote
+from urllib.parse import quote, urlsplit
 import warnings
 import plotly.express as px
 import plotly.graph_objects as go
 from streamlit_lottie import st_lottie
 import json
+import functools
+import hashlib
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import isodate  # For parsing YouTube duration
 import os
+import sys
 from dotenv import load_dotenv
+import metrics
+from singleflight import SingleFlight
+from store import VideoStore
+from thumbnails import ThumbnailCache
+from resilience import UpstreamGuard, UpstreamUnavailable
+import export
 
 warnings.filterwarnings('ignore')
 
 # YouTube API configuration (loaded from environment)
 load_dotenv()
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
-YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3"
+YOUTUBE_API_URL = os.getenv("YOUTUBE_API_URL", "https://www.googleapis.com/youtube/v3")
+GOOGLE_NEWS_URL = os.getenv("GOOGLE_NEWS_URL", "https://news.google.com")
+
+TIME_RANGE_MONTHS = {"1 month": 1, "2 months": 2, "3 months": 3, "6 months": 6, "1 year": 12}
+
+# How long a session waits on another session's identical search before running its own
+PIPELINE_WAIT_TIMEOUT = 60
+
+# Freshness of the shared video store, in seconds
+VIDEO_DETAILS_TTL = 30 * 60
+VIDEO_COMMENTS_TTL = 6 * 60 * 60
+EMPTY_COMMENTS_TTL = 5 * 60
+
+# Retained analysis results per session, in megabytes
+SESSION_MEMORY_BUDGET_MB = float(os.getenv("SESSION_MEMORY_BUDGET_MB", "4"))
+
+# Description length kept when a session's results exceed the memory budget
+DESCRIPTION_PREVIEW_CHARS = 150
+
+# Cached chart figures kept per process
+CHART_CACHE_ENTRIES = 64
+
+# Engagement scatter switches to WebGL above this many points...
+SCATTER_WEBGL_THRESHOLD = 1000
+# ...and is downsampled above this many
+SCATTER_MAX_POINTS = 5000
+
+# On-disk thumbnail cache; set THUMBNAIL_CACHE_MB=0 to load thumbnails straight from YouTube
+THUMBNAIL_CACHE_DIR = os.getenv("THUMBNAIL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "celebrity-thumbnails"))
+THUMBNAIL_CACHE_MB = float(os.getenv("THUMBNAIL_CACHE_MB", "200"))
+THUMBNAIL_WIDTH = 320
+
+VIDEOS_PER_PAGE = 10
+
+# YouTube search variants, fetched concurrently and merged, as "query template|order"
+# entries separated by ";". Each variant is a search.list call costing 100 units of
+# the API's daily quota (10,000 by default), so every extra variant adds 100 units
+# per analysis on top of the videos and commentThreads calls.
+YOUTUBE_QUERY_VARIANTS = [
+    (query.strip(), order.strip() or "relevance")
+    for query, _, order in (
+        variant.partition("|")
+        for variant in os.getenv(
+            "YOUTUBE_QUERY_VARIANTS", "{name} news interview|relevance;{name} interview|relevance"
+        ).split(";")
+    )
+    if query.strip()
+]
+
+# Weights of search relevance and engagement in a video's rank score
+RELEVANCE_WEIGHT = 0.7
+ENGAGEMENT_WEIGHT = 0.3
+# Reciprocal rank fusion constant; larger values flatten the gap between ranks
+RANK_FUSION_K = 10
+
+# Maximum IDs the YouTube `videos` endpoint accepts per call
+VIDEOS_BATCH_SIZE = 50
+
+# Per-host request rate limits as (requests per second, burst)
+UPSTREAM_RATE_LIMITS = {
+    urlsplit(YOUTUBE_API_URL).netloc: (10, 20),
+    urlsplit(GOOGLE_NEWS_URL).netloc: (1, 3),
+}
+# Longest a request waits for a rate-limit token before failing fast
+UPSTREAM_MAX_WAIT = 5
+# Consecutive failures that open a host's circuit, and how long it stays open
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 30
+
+# When set, every upstream response is captured to this directory (see replay.py)
+RECORD_DIR = os.getenv("RECORD_DIR")
 
 # Configure the page
 st.set_page_config(
@@ -136,114 +219,323 @@ def add_custom_css():
     </style>
     """, unsafe_allow_html=True)
 
-def search_youtube_videos(celebrity_name, max_results=20):
+@st.cache_resource
+def get_upstream_guard():
     """
-    Search YouTube for videos about the celebrity
+    Process-wide rate limiters and circuit breakers, one per upstream host
     """
-    try:
-        # Search for videos
-        search_url = f"{YOUTUBE_API_URL}/search"
-        search_params = {
-            'part': 'snippet',
-            'q': f"{celebrity_name} news interview",
-            'type': 'video',
-            'maxResults': max_results,
-            'order': 'relevance',
+    return UpstreamGuard(
+        UPSTREAM_RATE_LIMITS,
+        max_wait=UPSTREAM_MAX_WAIT,
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=CIRCUIT_RESET_TIMEOUT
+    )
+
+def http_get(url, **kwargs):
+    """
+    GET an upstream URL, recording the response when RECORD_DIR is set
+
+    Requests are rate limited and circuit broken per host; while a host is
+    unhealthy the last good response is served, or UpstreamUnavailable raised.
+    """
+    response = get_upstream_guard().get(requests.get, url, **kwargs)
+    if RECORD_DIR:
+        from replay import record_response
+        record_response(RECORD_DIR, response)
+    return response
+
+@st.cache_resource
+def get_video_store():
+    """
+    Process-wide store of video details, comments and scores
+    """
+    return VideoStore()
+
+def parse_video_details(item):
+    """
+    Extract the fields we keep from a YouTube `videos` resource
+    """
+    details = {
+        'id': item['id'],
+        'title': item['snippet'].get('title', 'No Title'),
+        'description': item['snippet'].get('description', 'No description'),
+        'channel_title': sys.intern(item['snippet'].get('channelTitle', 'Unknown Channel')),
+        'published_at': item['snippet'].get('publishedAt', 'Unknown date'),
+        'view_count': int(item['statistics'].get('viewCount', 0)),
+        'like_count': int(item['statistics'].get('likeCount', 0)),
+        'comment_count': int(item['statistics'].get('commentCount', 0)),
+        'thumbnail_url': item['snippet']['thumbnails']['high']['url'] if 'thumbnails' in item['snippet'] else '',
+        'duration': parse_duration(item['contentDetails'].get('duration', 'PT0M'))
+    }
+    
+    # Clean description
+    if len(details['description']) > 500:
+        details['description'] = details['description'][:500] + '...'
+    
+    return details
+
+def score_video(details, comments):
+    """
+    Sentiment scores for a video's title, description and comments
+    """
+    # Analyze sentiment for title and description
+    title_sentiment, title_score, title_emoji = analyze_sentiment(details['title'])
+    desc_sentiment, desc_score, desc_emoji = analyze_sentiment(details['description'])
+    
+    # Analyze comments sentiment
+    if comments:
+        comment_sentiments = [analyze_sentiment(comment)[1] for comment in comments]
+        avg_comment_sentiment = sum(comment_sentiments) / len(comment_sentiments)
+    else:
+        avg_comment_sentiment = 0
+    
+    # Combined sentiment (weighted average)
+    combined_score = (title_score * 0.4 + desc_score * 0.3 + avg_comment_sentiment * 0.3)
+    combined_sentiment, _, combined_emoji = get_sentiment_from_score(combined_score)
+    
+    return {
+        'title_sentiment': title_sentiment,
+        'title_score': title_score,
+        'title_emoji': title_emoji,
+        'desc_sentiment': desc_sentiment,
+        'desc_score': desc_score,
+        'desc_emoji': desc_emoji,
+        'comment_sentiment_score': avg_comment_sentiment,
+        'combined_sentiment': combined_sentiment,
+        'combined_score': combined_score,
+        'combined_emoji': combined_emoji
+    }
+
+def fetch_video_details(video_ids, store):
+    """
+    Fetch details for the given videos into the store, batched per `videos` call
+
+    A batch YouTube won't serve right now keeps whatever the store already
+    holds for it, however stale; UpstreamUnavailable is only raised when
+    that leaves none of the videos with details.
+    """
+    videos_url = f"{YOUTUBE_API_URL}/videos"
+    unavailable = None
+    
+    for start in range(0, len(video_ids), VIDEOS_BATCH_SIZE):
+        videos_params = {
+            'part': 'snippet,statistics,contentDetails',
+            'id': ','.join(video_ids[start:start + VIDEOS_BATCH_SIZE]),
             'key': YOUTUBE_API_KEY
         }
         
-        search_response = requests.get(search_url, params=search_params, timeout=10)
+        try:
+            with metrics.span("youtube_videos"):
+                videos_response = http_get(videos_url, params=videos_params, timeout=10)
+                videos_data = videos_response.json()
+        except UpstreamUnavailable as e:
+            unavailable = e
+            continue
+        
+        for item in videos_data.get('items', []):
+            try:
+                store.put(item['id'], store.DETAILS, parse_video_details(item), ttl=VIDEO_DETAILS_TTL)
+            except Exception:
+                continue
+    
+    if unavailable is not None and not any(store.get(video_id, store.DETAILS) for video_id in video_ids):
+        raise unavailable
+
+@metrics.timed("youtube_search")
+def search_youtube_ids(query, order, max_results):
+    """
+    Video IDs for one YouTube search, or None if the search failed
+
+    UpstreamUnavailable is raised rather than swallowed, so callers can tell
+    a failing-fast host from an empty or over-quota search.
+    """
+    search_params = {
+        'part': 'snippet',
+        'q': query,
+        'type': 'video',
+        'maxResults': max_results,
+        'order': order,
+        'key': YOUTUBE_API_KEY
+    }
+    
+    try:
+        search_response = http_get(f"{YOUTUBE_API_URL}/search", params=search_params, timeout=10)
         search_data = search_response.json()
+    except UpstreamUnavailable:
+        raise
+    except Exception:
+        return None
+    
+    if 'items' not in search_data:
+        return None
+    
+    return [item['id']['videoId'] for item in search_data['items'] if 'id' in item and 'videoId' in item['id']]
+
+def fuse_rankings(rankings):
+    """
+    Merge ranked lists of video IDs into one relevance score per video, by
+    reciprocal rank fusion, in order of first appearance
+    """
+    relevance = {}
+    for video_ids in rankings:
+        for rank, video_id in enumerate(video_ids):
+            relevance[video_id] = relevance.get(video_id, 0) + 1 / (RANK_FUSION_K + rank + 1)
+    return relevance
+
+def rank_videos(relevance, details_by_id):
+    """
+    Combined relevance/engagement score per video, each part scaled to 0-1
+    """
+    engagement = {
+        video_id: math.log1p(details['view_count']) + math.log1p(details['like_count']) + math.log1p(details['comment_count'])
+        for video_id, details in details_by_id.items()
+    }
+    max_relevance = max(relevance[video_id] for video_id in details_by_id) if details_by_id else 0
+    max_engagement = max(engagement.values(), default=0)
+    
+    return {
+        video_id: RELEVANCE_WEIGHT * (relevance[video_id] / max_relevance if max_relevance else 0) +
+                  ENGAGEMENT_WEIGHT * (engagement[video_id] / max_engagement if max_engagement else 0)
+        for video_id in details_by_id
+    }
+
+@metrics.timed("search_youtube_videos")
+def search_youtube_videos(celebrity_name, max_results=20, query_variants=None):
+    """
+    Search YouTube for videos about the celebrity
+
+    Each query variant is searched concurrently and the results are merged
+    by video ID, ranked by combined relevance and engagement, and cut to
+    `max_results`. Details, comments and scores come from the shared video
+    store; only videos that are missing or stale there are fetched, and
+    comments are only fetched for videos that make the cut.
+    """
+    try:
+        # Search every query variant concurrently
+        variants = query_variants or YOUTUBE_QUERY_VARIANTS
+        ctx = get_script_run_ctx()
+        
+        def search(variant):
+            add_script_run_ctx(threading.current_thread(), ctx)
+            query, order = variant
+            try:
+                return search_youtube_ids(query.format(name=celebrity_name), order, max_results)
+            except UpstreamUnavailable as e:
+                return e
         
-        if 'items' not in search_data:
-            st.warning("No YouTube videos found or API quota exceeded.")
+        with ThreadPoolExecutor(max_workers=len(variants)) as executor:
+            results = list(executor.map(search, variants))
+        
+        unavailable = [result for result in results if isinstance(result, UpstreamUnavailable)]
+        results = [result for result in results if isinstance(result, list)]
+        if not results:
+            if len(unavailable) == len(variants):
+                raise unavailable[0]
+            notify("warning", "No YouTube videos found or API quota exceeded.", failed=True)
             return []
         
-        video_ids = [item['id']['videoId'] for item in search_data['items'] if 'id' in item and 'videoId' in item['id']]
+        relevance = fuse_rankings(results)
+        video_ids = list(relevance)
         
         if not video_ids:
             return []
         
-        # Get video details
-        videos_url = f"{YOUTUBE_API_URL}/videos"
-        videos_params = {
-            'part': 'snippet,statistics,contentDetails',
-            'id': ','.join(video_ids),
-            'key': YOUTUBE_API_KEY
-        }
+        store = get_video_store()
+        celebrity_name = sys.intern(celebrity_name)
+        
+        # Get video details, only for videos we don't already hold fresh
+        stale_details = store.stale_ids(video_ids, store.DETAILS)
+        if stale_details:
+            fetch_video_details(stale_details, store)
         
-        videos_response = requests.get(videos_url, params=videos_params, timeout=10)
-        videos_data = videos_response.json()
+        video_ids = [video_id for video_id in video_ids if store.get(video_id, store.DETAILS)]
+        rank_scores = rank_videos(
+            relevance, {video_id: store.get(video_id, store.DETAILS) for video_id in video_ids}
+        )
+        video_ids = sorted(video_ids, key=rank_scores.get, reverse=True)[:max_results]
+        
+        # Get comments for the videos (limited to 10 per video)
+        comments_unavailable = set()
+        for video_id in store.stale_ids(video_ids, store.COMMENTS):
+            if comments_unavailable:
+                # YouTube already refused a comments call; don't queue the rest behind it
+                comments_unavailable.add(video_id)
+                continue
+            try:
+                comments = get_video_comments(video_id)
+            except UpstreamUnavailable:
+                comments_unavailable.add(video_id)
+                continue
+            if not comments and store.get(video_id, store.COMMENTS):
+                # Keep serving the stale comments rather than replacing them with nothing
+                continue
+            # Comments may be disabled or quota exhausted; retry those sooner
+            ttl = VIDEO_COMMENTS_TTL if comments else EMPTY_COMMENTS_TTL
+            store.put(video_id, store.COMMENTS, comments, ttl=ttl)
         
         youtube_videos = []
         
-        for item in videos_data.get('items', []):
+        for video_id in video_ids:
             try:
-                # Get comments for the video (limited to 10 per video)
-                comments = get_video_comments(item['id'])
-                
-                video_data = {
-                    'id': item['id'],
-                    'title': item['snippet'].get('title', 'No Title'),
-                    'description': item['snippet'].get('description', 'No description'),
-                    'channel_title': item['snippet'].get('channelTitle', 'Unknown Channel'),
-                    'published_at': item['snippet'].get('publishedAt', 'Unknown date'),
-                    'view_count': int(item['statistics'].get('viewCount', 0)),
-                    'like_count': int(item['statistics'].get('likeCount', 0)),
-                    'comment_count': int(item['statistics'].get('commentCount', 0)),
-                    'thumbnail_url': item['snippet']['thumbnails']['high']['url'] if 'thumbnails' in item['snippet'] else '',
-                    'duration': parse_duration(item['contentDetails'].get('duration', 'PT0M')),
-                    'comments': comments,
-                    'celebrity': celebrity_name,
-                    'type': 'youtube'
-                }
-                
-                # Clean description
-                if len(video_data['description']) > 500:
-                    video_data['description'] = video_data['description'][:500] + '...'
+                details = store.get(video_id, store.DETAILS)
                 
-                # Analyze sentiment for title and description
-                title_sentiment, title_score, title_emoji = analyze_sentiment(video_data['title'])
-                desc_sentiment, desc_score, desc_emoji = analyze_sentiment(video_data['description'])
-                
-                # Analyze comments sentiment
-                if comments:
-                    comment_sentiments = [analyze_sentiment(comment)[1] for comment in comments]
-                    avg_comment_sentiment = sum(comment_sentiments) / len(comment_sentiments)
-                else:
-                    avg_comment_sentiment = 0
-                
-                # Combined sentiment (weighted average)
-                combined_score = (title_score * 0.4 + desc_score * 0.3 + avg_comment_sentiment * 0.3)
-                combined_sentiment, _, combined_emoji = get_sentiment_from_score(combined_score)
+                scores = store.get(video_id, store.SCORES)
+                if scores is None:
+                    comments = store.get(video_id, store.COMMENTS)
+                    scores = score_video(details, comments or [])
+                    if comments is not None or video_id not in comments_unavailable:
+                        # Scored without its comments only because YouTube refused
+                        # them; don't share that with other searches
+                        store.put(video_id, store.SCORES, scores)
                 
+                # Comment bodies stay in the store; see load_video_comments()
+                video_data = dict(details)
                 video_data.update({
-                    'title_sentiment': title_sentiment,
-                    'title_score': title_score,
-                    'title_emoji': title_emoji,
-                    'desc_sentiment': desc_sentiment,
-                    'desc_score': desc_score,
-                    'desc_emoji': desc_emoji,
-                    'comment_sentiment_score': avg_comment_sentiment,
-                    'combined_sentiment': combined_sentiment,
-                    'combined_score': combined_score,
-                    'combined_emoji': combined_emoji
+                    'celebrity': celebrity_name,
+                    'type': 'youtube',
+                    'rank_score': rank_scores[video_id]
                 })
+                video_data.update(scores)
                 
                 youtube_videos.append(video_data)
                 
             except Exception as e:
                 continue
+        
+        if comments_unavailable:
+            notify("warning", "YouTube comments are temporarily unavailable; some videos are scored without them.", failed=True)
                 
         return youtube_videos
         
+    except UpstreamUnavailable as e:
+        notify("warning", f"YouTube is temporarily unavailable ({e}). Try again shortly.", failed=True)
+        return []
     except Exception as e:
-        st.error(f"YouTube API error: {str(e)}")
+        notify("error", f"YouTube API error: {str(e)}", failed=True)
         return []
 
+def load_video_comments(video_id):
+    """
+    Get comments for a video from the shared store, refetching them if evicted
+    """
+    store = get_video_store()
+    comments = store.get(video_id, store.COMMENTS)
+    if comments is None:
+        try:
+            comments = get_video_comments(video_id)
+        except UpstreamUnavailable:
+            return []
+        ttl = VIDEO_COMMENTS_TTL if comments else EMPTY_COMMENTS_TTL
+        store.put(video_id, store.COMMENTS, comments, ttl=ttl)
+    return comments
+
+@metrics.timed("youtube_comments")
 def get_video_comments(video_id, max_comments=10):
     """
     Get comments for a YouTube video
+
+    Raises UpstreamUnavailable when YouTube won't take the call right now, so
+    that isn't mistaken for a video without comments.
     """
     try:
         comments_url = f"{YOUTUBE_API_URL}/commentThreads"
@@ -255,7 +547,7 @@ def get_video_comments(video_id, max_comments=10):
             'key': YOUTUBE_API_KEY
         }
         
-        comments_response = requests.get(comments_url, params=comments_params, timeout=10)
+        comments_response = http_get(comments_url, params=comments_params, timeout=10)
         comments_data = comments_response.json()
         
         comments = []
@@ -270,6 +562,8 @@ def get_video_comments(video_id, max_comments=10):
             
         return comments
         
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         # Comments might be disabled or API quota exceeded
         return []
@@ -283,6 +577,7 @@ def parse_duration(duration):
     except:
         return "Unknown"
 
+@metrics.timed("analyze_sentiment")
 def analyze_sentiment(text):
     """
     Analyze sentiment of text using TextBlob
@@ -306,6 +601,7 @@ def get_sentiment_from_score(score):
     else:
         return "Neutral", score, "😐"
 
+@metrics.timed("search_google_news")
 def search_google_news(celebrity_name, months=3):
     """
     Search Google News for celebrity news from past months
@@ -318,23 +614,27 @@ def search_google_news(celebrity_name, months=3):
     start_str = start_date.strftime("%Y-%m-%d")
     end_str = end_date.strftime("%Y-%m-%d")
     
+    celebrity_name = sys.intern(celebrity_name)
+    
     # Create search query
     query = f"{celebrity_name} celebrity news"
     encoded_query = quote(query)
     
     # Google News URL with date range
-    url = f"https://news.google.com/rss/search?q={encoded_query}+after:{start_str}+before:{end_str}&hl=en-US&gl=US&ceid=US:en"
+    url = f"{GOOGLE_NEWS_URL}/rss/search?q={encoded_query}+after:{start_str}+before:{end_str}&hl=en-US&gl=US&ceid=US:en"
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        with metrics.span("news_fetch"):
+            response = http_get(url, headers=headers, timeout=10)
+            response.raise_for_status()
 
-        soup = BeautifulSoup(response.content, 'xml')
-        items = soup.find_all('item')
+        with metrics.span("news_parse"):
+            soup = BeautifulSoup(response.content, 'xml')
+            items = soup.find_all('item')
 
         news_articles = []
 
@@ -343,7 +643,7 @@ def search_google_news(celebrity_name, months=3):
                 title = item.title.text if item.title else "No title"
                 link = item.link.text if item.link else "#"
                 pub_date = item.pubDate.text if item.pubDate else "Unknown date"
-                source = item.source.text if item.source else "Unknown source"
+                source = sys.intern(item.source.text) if item.source else "Unknown source"
 
                 # Clean the title
                 title = re.sub(r'[^\x00-\x7F]+', ' ', title)
@@ -359,20 +659,23 @@ def search_google_news(celebrity_name, months=3):
             except Exception:
                 continue
                 
-        # If no articles were found with the date filters, try a broader search without dates
-        if not news_articles:
+        # If no articles were found with the date filters, try a broader search without dates,
+        # unless Google News is already pushing back
+        if not news_articles and get_upstream_guard().is_healthy(url):
             try:
-                fallback_url = f"https://news.google.com/rss/search?q={encoded_query}&hl=en-US&gl=US&ceid=US:en"
-                response2 = requests.get(fallback_url, headers=headers, timeout=10)
-                response2.raise_for_status()
-                soup2 = BeautifulSoup(response2.content, 'xml')
-                items2 = soup2.find_all('item')
+                fallback_url = f"{GOOGLE_NEWS_URL}/rss/search?q={encoded_query}&hl=en-US&gl=US&ceid=US:en"
+                with metrics.span("news_fetch"):
+                    response2 = http_get(fallback_url, headers=headers, timeout=10)
+                    response2.raise_for_status()
+                with metrics.span("news_parse"):
+                    soup2 = BeautifulSoup(response2.content, 'xml')
+                    items2 = soup2.find_all('item')
                 for item in items2[:40]:
                     try:
                         title = item.title.text if item.title else "No title"
                         link = item.link.text if item.link else "#"
                         pub_date = item.pubDate.text if item.pubDate else "Unknown date"
-                        source = item.source.text if item.source else "Unknown source"
+                        source = sys.intern(item.source.text) if item.source else "Unknown source"
                         title = re.sub(r'[^\x00-\x7F]+', ' ', title)
                         news_articles.append({
                             'title': title,
@@ -385,22 +688,25 @@ def search_google_news(celebrity_name, months=3):
                         continue
                 # Inform the user in the Streamlit UI that a fallback was used
                 if news_articles:
-                    st.info("No results with date filters — showing broader search results.")
+                    notify("info", "No results with date filters — showing broader search results.")
             except Exception:
                 # If fallback also fails, just return what we have (empty)
                 return news_articles
 
         return news_articles
         
+    except UpstreamUnavailable as e:
+        notify("warning", f"Google News is temporarily unavailable ({e}). Try again shortly.", failed=True)
+        return []
     except Exception as e:
-        st.error(f"Error fetching news: {str(e)}")
+        notify("error", f"Error fetching news: {str(e)}", failed=True)
         return []  # Return empty list instead of None
 
-def get_news_from_multiple_sources(celebrity_name):
+def get_news_from_multiple_sources(celebrity_name, months=3):
     """
     Get news from multiple sources - FIXED VERSION
     """
-    articles = search_google_news(celebrity_name)
+    articles = search_google_news(celebrity_name, months)
     
     # Ensure articles is always a list, even if search_google_news returns None
     if articles is None:
@@ -416,7 +722,178 @@ def get_news_from_multiple_sources(celebrity_name):
     
     return articles
 
-def display_sentiment_comparison(news_articles, youtube_videos):
+class UpstreamFailure(Exception):
+    """
+    Raised out of a coalesced search when an upstream call failed, so waiting
+    sessions retry instead of sharing the failed result
+    """
+
+    def __init__(self, news_articles, youtube_videos, notices):
+        super().__init__("; ".join(message for _, message, failed in notices if failed))
+        self.news_articles = news_articles
+        self.youtube_videos = youtube_videos
+        self.notices = notices
+
+# Collects notify() messages while run_analysis is fetching
+_notices = threading.local()
+
+def notify(level, message, failed=False):
+    """
+    Show a message from the fetch pipeline (level is "info", "warning" or "error").
+
+    Inside run_analysis the message is returned with the results, so every
+    session sharing the run can display it; otherwise it is shown directly.
+    `failed` marks messages reporting an upstream failure.
+    """
+    collected = getattr(_notices, 'messages', None)
+    if collected is None:
+        getattr(st, level)(message)
+    else:
+        collected.append((level, message, failed))
+
+def display_notices(notices):
+    for level, message, _ in notices:
+        getattr(st, level)(message)
+
+@st.cache_resource
+def get_pipeline_flight():
+    """
+    Process-wide coalescer shared by every session
+    """
+    return SingleFlight()
+
+def normalize_celebrity_name(celebrity_name):
+    """
+    Case- and whitespace-insensitive form of a name, for use as a key
+    """
+    return " ".join(celebrity_name.split()).casefold()
+
+def run_analysis(celebrity_name, data_sources, months, max_items):
+    """
+    Fetch and score news articles and YouTube videos for a celebrity.
+
+    Concurrent identical searches from different sessions share one run, so
+    the returned articles and videos must be treated as read-only. Returns
+    the articles, the videos and the (level, message, failed) notices the
+    run produced, for the caller to display.
+
+    If an upstream call failed, the run's caller gets its partial results
+    while sessions waiting on it retry together once; if that run fails too,
+    they all get its partial results and notices.
+    """
+    key = (normalize_celebrity_name(celebrity_name), tuple(sorted(data_sources)), months, max_items)
+
+    def fetch():
+        news_articles = []
+        youtube_videos = []
+        _notices.messages = notices = []
+        try:
+            if "News Articles" in data_sources:
+                news_articles = get_news_from_multiple_sources(celebrity_name, months)
+            if "YouTube Videos" in data_sources:
+                youtube_videos = search_youtube_videos(celebrity_name, max_items)
+        finally:
+            _notices.messages = None
+        if any(failed for _, _, failed in notices):
+            raise UpstreamFailure(news_articles, youtube_videos, notices)
+        return news_articles, youtube_videos, notices
+
+    with metrics.span("run_analysis"):
+        try:
+            news_articles, youtube_videos, notices = get_pipeline_flight().do(
+                key, fetch, timeout=PIPELINE_WAIT_TIMEOUT
+            )
+        except UpstreamFailure as e:
+            news_articles, youtube_videos, notices = e.news_articles, e.youtube_videos, e.notices
+    return list(news_articles), list(youtube_videos), list(notices)
+
+def measure_memory(obj):
+    """
+    Approximate deep size of an object in bytes, counting shared objects once
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            stack.extend(item)
+    return total
+
+def fit_to_memory_budget(analysis):
+    """
+    Shrink an analysis until it fits the per-session memory budget.
+
+    Video descriptions are shortened first; if that is not enough, the
+    lowest-ranked articles and videos are dropped.
+    """
+    budget = SESSION_MEMORY_BUDGET_MB * 1024 * 1024
+    analysis['memory_bytes'] = measure_memory(analysis)
+    if analysis['memory_bytes'] <= budget:
+        return analysis
+    
+    # Results may be shared with other sessions, so copy rather than edit in place
+    youtube_videos = []
+    for video in analysis['youtube_videos']:
+        if len(video['description']) > DESCRIPTION_PREVIEW_CHARS:
+            video = dict(video, description=video['description'][:DESCRIPTION_PREVIEW_CHARS] + '...')
+        youtube_videos.append(video)
+    analysis['youtube_videos'] = youtube_videos
+    analysis['memory_bytes'] = measure_memory(analysis)
+    
+    while analysis['memory_bytes'] > budget and (analysis['news_articles'] or analysis['youtube_videos']):
+        longer = max(analysis['news_articles'], analysis['youtube_videos'], key=len)
+        drop = max(1, len(longer) // 10)
+        del longer[-drop:]
+        analysis['dropped_items'] += drop
+        analysis['memory_bytes'] = measure_memory(analysis)
+    
+    return analysis
+
+def result_fingerprint(items, fields):
+    """
+    Short hash identifying a result set by the fields its charts depend on
+    """
+    digest = hashlib.sha1()
+    for item in items:
+        digest.update(repr(tuple(item[field] for field in fields)).encode('utf-8'))
+    return digest.hexdigest()
+
+def news_fingerprint(news_articles):
+    return result_fingerprint(news_articles, ('link', 'sentiment'))
+
+def videos_fingerprint(youtube_videos):
+    return result_fingerprint(
+        youtube_videos, ('id', 'view_count', 'like_count', 'comment_count', 'combined_sentiment', 'combined_score')
+    )
+
+@st.cache_data(max_entries=CHART_CACHE_ENTRIES, show_spinner=False)
+@metrics.timed("build_sentiment_figure")
+def build_sentiment_figure(result_key, label, _sentiments):
+    """
+    Stacked bar of the sentiment distribution, cached per result set
+    """
+    positive = _sentiments.count("Positive") / len(_sentiments) * 100
+    negative = _sentiments.count("Negative") / len(_sentiments) * 100
+    neutral = _sentiments.count("Neutral") / len(_sentiments) * 100
+    
+    fig = go.Figure(data=[
+        go.Bar(name='Positive', x=[label], y=[positive], marker_color='#28a745'),
+        go.Bar(name='Negative', x=[label], y=[negative], marker_color='#dc3545'),
+        go.Bar(name='Neutral', x=[label], y=[neutral], marker_color='#6c757d')
+    ])
+    fig.update_layout(title=f'{label} Sentiment Distribution', barmode='stack')
+    return fig
+
+@metrics.timed("render_sentiment_comparison")
+def display_sentiment_comparison(news_articles, youtube_videos, news_key=None, videos_key=None):
     """
     Display comparison between news and YouTube sentiment
     """
@@ -428,16 +905,7 @@ def display_sentiment_comparison(news_articles, youtube_videos):
     with col1:
         if news_articles:
             news_sentiments = [article['sentiment'] for article in news_articles]
-            news_positive = news_sentiments.count("Positive") / len(news_sentiments) * 100
-            news_negative = news_sentiments.count("Negative") / len(news_sentiments) * 100
-            news_neutral = news_sentiments.count("Neutral") / len(news_sentiments) * 100
-            
-            fig_news = go.Figure(data=[
-                go.Bar(name='Positive', x=['News'], y=[news_positive], marker_color='#28a745'),
-                go.Bar(name='Negative', x=['News'], y=[news_negative], marker_color='#dc3545'),
-                go.Bar(name='Neutral', x=['News'], y=[news_neutral], marker_color='#6c757d')
-            ])
-            fig_news.update_layout(title='News Sentiment Distribution', barmode='stack')
+            fig_news = build_sentiment_figure(news_key or news_fingerprint(news_articles), 'News', news_sentiments)
             st.plotly_chart(fig_news, use_container_width=True)
         else:
             st.info("No news articles to display")
@@ -445,20 +913,25 @@ def display_sentiment_comparison(news_articles, youtube_videos):
     with col2:
         if youtube_videos:
             yt_sentiments = [video['combined_sentiment'] for video in youtube_videos]
-            yt_positive = yt_sentiments.count("Positive") / len(yt_sentiments) * 100
-            yt_negative = yt_sentiments.count("Negative") / len(yt_sentiments) * 100
-            yt_neutral = yt_sentiments.count("Neutral") / len(yt_sentiments) * 100
-            
-            fig_yt = go.Figure(data=[
-                go.Bar(name='Positive', x=['YouTube'], y=[yt_positive], marker_color='#28a745'),
-                go.Bar(name='Negative', x=['YouTube'], y=[yt_negative], marker_color='#dc3545'),
-                go.Bar(name='Neutral', x=['YouTube'], y=[yt_neutral], marker_color='#6c757d')
-            ])
-            fig_yt.update_layout(title='YouTube Sentiment Distribution', barmode='stack')
+            fig_yt = build_sentiment_figure(videos_key or videos_fingerprint(youtube_videos), 'YouTube', yt_sentiments)
             st.plotly_chart(fig_yt, use_container_width=True)
         else:
             st.info("No YouTube videos to display")
 
+@st.cache_resource
+def get_thumbnail_cache():
+    """
+    Process-wide thumbnail cache, or None when disabled or its directory is unusable
+    """
+    if THUMBNAIL_CACHE_MB <= 0:
+        return None
+    try:
+        return ThumbnailCache(THUMBNAIL_CACHE_DIR, int(THUMBNAIL_CACHE_MB * 1024 * 1024), width=THUMBNAIL_WIDTH)
+    except OSError:
+        # Read-only or full disk: fall back to loading thumbnails straight from YouTube
+        return None
+
+@metrics.timed("render_youtube_videos")
 def display_youtube_videos(youtube_videos, sentiment_filter="All"):
     """
     Display YouTube videos with sentiment analysis
@@ -475,13 +948,31 @@ def display_youtube_videos(youtube_videos, sentiment_filter="All"):
     
     st.markdown(f"**Showing {len(filtered_videos)} YouTube videos**")
     
-    for video in filtered_videos:
+    # Paginate so each rerun only renders (and fetches thumbnails for) one page
+    page_count = max(1, -(-len(filtered_videos) // VIDEOS_PER_PAGE))
+    page = 1
+    if page_count > 1:
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1,
+                               key=f"youtube_page_{sentiment_filter}_{len(filtered_videos)}")
+    start = (page - 1) * VIDEOS_PER_PAGE
+    page_videos = filtered_videos[start:start + VIDEOS_PER_PAGE]
+    
+    thumbnail_cache = get_thumbnail_cache()
+    thumbnails = {}
+    if thumbnail_cache is not None:
+        with metrics.span("thumbnails"):
+            thumbnails = thumbnail_cache.get_many(video['thumbnail_url'] for video in page_videos)
+        next_page = filtered_videos[start + VIDEOS_PER_PAGE:start + 2 * VIDEOS_PER_PAGE]
+        thumbnail_cache.prefetch(video['thumbnail_url'] for video in next_page)
+    
+    for video in page_videos:
         with st.container():
             col1, col2 = st.columns([1, 2])
             
             with col1:
                 if video['thumbnail_url']:
-                    st.image(video['thumbnail_url'], use_column_width=True)
+                    # Fall back to the remote image if the cache couldn't fetch it
+                    st.image(thumbnails.get(video['thumbnail_url']) or video['thumbnail_url'], use_column_width=True)
                 st.markdown(f"**Views:** {video['view_count']:,}")
                 st.markdown(f"**Likes:** {video['like_count']:,}")
                 st.markdown(f"**Comments:** {video['comment_count']:,}")
@@ -514,56 +1005,82 @@ def display_youtube_videos(youtube_videos, sentiment_filter="All"):
                     st.write(video['description'])
                     
                     st.markdown("**Top Comments:**")
-                    if video['comments']:
-                        for i, comment in enumerate(video['comments'][:5], 1):
-                            comment_sentiment, comment_score, comment_emoji = analyze_sentiment(comment)
-                            st.write(f"{i}. {comment_emoji} {comment[:200]}...")
-                    else:
-                        st.write("No comments available or comments disabled")
+                    if st.toggle("Show comments", key=f"comments_{video['id']}"):
+                        comments = load_video_comments(video['id'])
+                        if comments:
+                            for i, comment in enumerate(comments[:5], 1):
+                                comment_sentiment, comment_score, comment_emoji = analyze_sentiment(comment)
+                                st.write(f"{i}. {comment_emoji} {comment[:200]}...")
+                        else:
+                            st.write("No comments available or comments disabled")
                 
                 # YouTube link
                 st.markdown(f"[Watch on YouTube](https://www.youtube.com/watch?v={video['id']})")
             
             st.markdown("---")
 
-def display_engagement_metrics(youtube_videos):
+def downsample_for_scatter(df, max_points):
+    """
+    Keep the most-viewed videos plus a fixed-seed random sample of the rest
+    """
+    top = df.nlargest(max_points // 10, 'view_count')
+    rest = df.drop(top.index).sample(n=max_points - len(top), random_state=0)
+    return pd.concat([top, rest])
+
+@st.cache_data(max_entries=CHART_CACHE_ENTRIES, show_spinner=False)
+@metrics.timed("build_engagement_figure")
+def build_engagement_figure(result_key, _youtube_videos):
+    """
+    Engagement scatter, cached per result set; WebGL and downsampled when large
+    """
+    df = pd.DataFrame(_youtube_videos, columns=['view_count', 'like_count', 'comment_count',
+                                                'combined_sentiment', 'title'])
+    total = len(df)
+    title = 'Video Engagement vs Sentiment'
+    if total > SCATTER_MAX_POINTS:
+        df = downsample_for_scatter(df, SCATTER_MAX_POINTS)
+        title += f' (sample of {len(df):,} of {total:,} videos)'
+    
+    return px.scatter(df, x='view_count', y='like_count', 
+                      size='comment_count', color='combined_sentiment',
+                      hover_data=['title'],
+                      title=title,
+                      render_mode='webgl' if len(df) > SCATTER_WEBGL_THRESHOLD else 'svg',
+                      color_discrete_map={
+                          'Positive': '#28a745',
+                          'Negative': '#dc3545', 
+                          'Neutral': '#6c757d'
+                      })
+
+@metrics.timed("render_engagement_metrics")
+def display_engagement_metrics(youtube_videos, videos_key=None):
     """
     Display YouTube engagement metrics
     """
     if not youtube_videos:
         return
     
-    df = pd.DataFrame(youtube_videos)
-    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_views = df['view_count'].sum()
+        total_views = sum(video['view_count'] for video in youtube_videos)
         st.metric("Total Views", f"{total_views:,}")
     
     with col2:
-        total_likes = df['like_count'].sum()
+        total_likes = sum(video['like_count'] for video in youtube_videos)
         st.metric("Total Likes", f"{total_likes:,}")
     
     with col3:
-        avg_sentiment = df['combined_score'].mean()
+        avg_sentiment = sum(video['combined_score'] for video in youtube_videos) / len(youtube_videos)
         st.metric("Avg. Sentiment", f"{avg_sentiment:.3f}")
     
     with col4:
-        total_comments = df['comment_count'].sum()
+        total_comments = sum(video['comment_count'] for video in youtube_videos)
         st.metric("Total Comments", f"{total_comments:,}")
     
     # Engagement chart
     if len(youtube_videos) > 1:
-        fig = px.scatter(df, x='view_count', y='like_count', 
-                         size='comment_count', color='combined_sentiment',
-                         hover_data=['title'],
-                         title='Video Engagement vs Sentiment',
-                         color_discrete_map={
-                             'Positive': '#28a745',
-                             'Negative': '#dc3545', 
-                             'Neutral': '#6c757d'
-                         })
+        fig = build_engagement_figure(videos_key or videos_fingerprint(youtube_videos), youtube_videos)
         st.plotly_chart(fig, use_container_width=True)
 
 def main():
@@ -627,6 +1144,10 @@ def main():
             st.success("YouTube API: ✅ Connected")
         else:
             st.error("YouTube API: ❌ Not Configured")
+        display_upstream_status()
+
+        # Filled in at the end of the run so it includes this run's timings
+        metrics_panel = st.empty()
 
     # Main content area
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -643,31 +1164,48 @@ def main():
             st.error("Please enter a celebrity name!")
             return
         
-        # Initialize data containers
-        news_articles = []
-        youtube_videos = []
-        
         # Add progress bar for better UX
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        # Fetch news articles
-        if "News Articles" in data_sources:
-            status_text.text("Searching for news articles...")
-            news_articles = get_news_from_multiple_sources(celebrity_name)
-            progress_bar.progress(33)
-        
-        # Fetch YouTube videos
-        if "YouTube Videos" in data_sources:
-            status_text.text("Searching YouTube videos...")
-            youtube_videos = search_youtube_videos(celebrity_name, max_items)
-            progress_bar.progress(66)
+        # Fetch news articles and YouTube videos
+        status_text.text("Searching news articles and YouTube videos...")
+        progress_bar.progress(33)
+        news_articles, youtube_videos, notices = run_analysis(
+            celebrity_name, data_sources, TIME_RANGE_MONTHS[time_range], max_items
+        )
+        progress_bar.progress(66)
         
         status_text.text("Analyzing sentiment...")
         progress_bar.progress(100)
         time.sleep(0.5)
         progress_bar.empty()
         status_text.empty()
+        display_notices(notices)
+        
+        # Keep results across reruns (filters, comment toggles) within the memory budget
+        st.session_state['analysis'] = fit_to_memory_budget({
+            'celebrity_name': celebrity_name,
+            'time_range': time_range,
+            'news_articles': news_articles,
+            'youtube_videos': youtube_videos,
+            'dropped_items': 0
+        })
+        analysis = st.session_state['analysis']
+        # Identify the result set for chart caching, after any budget trimming
+        analysis['news_key'] = news_fingerprint(analysis['news_articles'])
+        analysis['videos_key'] = videos_fingerprint(analysis['youtube_videos'])
+    
+    analysis = st.session_state.get('analysis')
+    if analysis:
+        # Show what was analyzed, even if the sidebar has changed since
+        celebrity_name = analysis['celebrity_name']
+        time_range = analysis['time_range']
+        news_articles = analysis['news_articles']
+        youtube_videos = analysis['youtube_videos']
+        
+        if analysis['dropped_items']:
+            st.warning(f"{analysis['dropped_items']} items were left out to stay within the per-session memory budget.")
         
         # Display results in tabs
         if news_articles or youtube_videos:
@@ -690,7 +1228,8 @@ def main():
                 
                 # Display comparison
                 if news_articles or youtube_videos:
-                    display_sentiment_comparison(news_articles, youtube_videos)
+                    display_sentiment_comparison(news_articles, youtube_videos,
+                                                 analysis['news_key'], analysis['videos_key'])
                 
                 # Overall metrics
                 col1, col2, col3, col4 = st.columns(4)
@@ -725,7 +1264,7 @@ def main():
                 # YouTube engagement metrics
                 if youtube_videos:
                     st.subheader("🎬 YouTube Engagement Metrics")
-                    display_engagement_metrics(youtube_videos)
+                    display_engagement_metrics(youtube_videos, analysis['videos_key'])
             
             with tab2:
                 if news_articles:
@@ -766,51 +1305,34 @@ def main():
             # Download option
             st.subheader("💾 Download Results")
             
-            # Combine data for download
-            all_data = []
-            for article in news_articles:
-                all_data.append({
-                    'type': 'news',
-                    'title': article['title'],
-                    'source': article['source'],
-                    'date': article['date'],
-                    'sentiment': article['sentiment'],
-                    'sentiment_score': article['sentiment_score'],
-                    'link': article['link']
-                })
-            
-            for video in youtube_videos:
-                all_data.append({
-                    'type': 'youtube',
-                    'title': video['title'],
-                    'channel': video['channel_title'],
-                    'published_at': video['published_at'],
-                    'views': video['view_count'],
-                    'likes': video['like_count'],
-                    'comments': video['comment_count'],
-                    'sentiment': video['combined_sentiment'],
-                    'sentiment_score': video['combined_score'],
-                    'link': f"https://www.youtube.com/watch?v={video['id']}"
-                })
-            
-            if all_data:
-                df = pd.DataFrame(all_data)
-                csv = df.to_csv(index=False)
-                
-                col1, col2, col3 = st.columns([1, 2, 1])
-                with col2:
-                    st.download_button(
-                        label="Download Combined CSV",
-                        data=csv,
-                        file_name=f"{celebrity_name.replace(' ', '_')}_combined_analysis.csv",
-                        mime="text/csv",
-                        use_container_width=True
-                    )
+            # Exports are generated only when the download button is clicked
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col2:
+                export_format = st.selectbox("Export Format", list(export.FORMATS), key="export_format")
+                include_comments = st.checkbox(
+                    "Include per-comment rows", key="export_comments",
+                    help="Adds one row per YouTube comment, with its sentiment"
+                )
+                extension, mime = export.FORMATS[export_format]
+                st.download_button(
+                    label=f"Download Combined {export_format}",
+                    data=functools.partial(
+                        build_export, news_articles, youtube_videos, export_format, include_comments
+                    ),
+                    file_name=f"{celebrity_name.replace(' ', '_')}_combined_analysis.{extension}",
+                    mime=mime,
+                    use_container_width=True
+                )
         
         else:
             st.warning(f"No data found for '{celebrity_name}' across selected sources.")
             st.info("Try searching for a different celebrity or check the spelling.")
     
+    if metrics.ENABLED:
+        metrics.export()
+        with metrics_panel.container():
+            display_metrics_panel(analysis)
+
     # Add footer
     st.markdown("---")
     st.markdown(
@@ -818,6 +1340,51 @@ def main():
         unsafe_allow_html=True
     )
 
+@metrics.timed("build_export")
+def build_export(news_articles, youtube_videos, export_format, include_comments=False):
+    """
+    Stream the analysis results into an export file's contents
+    """
+    load_comments = load_video_comments if include_comments else None
+    rows = export.iter_rows(news_articles, youtube_videos, load_comments, analyze_sentiment)
+    return export.export_bytes(rows, export_format)
+
+def display_upstream_status():
+    """
+    Display rate-limit and circuit-breaker state for each upstream host
+    """
+    for host, (status, rate, retry_in) in sorted(get_upstream_guard().status().items()):
+        if status == 'open':
+            st.error(f"{host}: 🔴 Failing fast, retry in {retry_in:.0f}s")
+        elif status == 'recovering':
+            st.warning(f"{host}: 🟠 Recovering")
+        elif status == 'throttled':
+            st.warning(f"{host}: 🟡 Throttled to {rate:.1f} req/s")
+        else:
+            st.caption(f"{host}: 🟢 Healthy")
+
+def display_metrics_panel(analysis=None):
+    """
+    Display per-stage timing histograms in a collapsible debug panel
+    """
+    with st.expander("⏱️ Performance Timings"):
+        if analysis:
+            st.caption(f"Session results: {analysis['memory_bytes'] / 1024:,.0f} KB "
+                       f"of {SESSION_MEMORY_BUDGET_MB:g} MB budget")
+        rows = metrics.snapshot()
+        if not rows:
+            st.caption("No timings recorded yet.")
+            return
+        df = pd.DataFrame(rows).round(1)
+        st.dataframe(df, hide_index=True, use_container_width=True)
+        if metrics.METRICS_FILE:
+            st.caption(f"Prometheus metrics written to `{metrics.METRICS_FILE}`")
+        if metrics.http_server_error():
+            st.caption(f"Prometheus metrics server failed to start: {metrics.http_server_error()}")
+        elif metrics.METRICS_PORT:
+            st.caption(f"Prometheus metrics served at `{metrics.METRICS_HOST}:{metrics.METRICS_PORT}/metrics`")
+
+@metrics.timed("render_articles_with_sentiment")
 def display_articles_with_sentiment(articles, sentiment_filter):
     """
     Display articles with enhanced UI based on sentiment
@@ -0,0 +1,188 @@
+"""
+Offline end-to-end latency benchmark.
+
+Replays recorded fixtures (see replay.py) through a local stand-in server and
+reports per-stage timings plus p50/p95 end-to-end latency:
+
+    python benchmark.py --fixtures fixtures --name "Taylor Swift" --runs 20 --latency 0.05
+
+Stages are measured as self time, so a TextBlob call made while rendering is
+counted under "score", not "render". Work done on worker threads (concurrent
+YouTube searches) is summed across threads.
+"""
+import argparse
+import functools
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+
+from replay import ReplayServer
+
+STAGES = ['fetch', 'parse', 'score', 'aggregate', 'render']
+
+
+class StageClock:
+    """
+    Accumulates exclusive (self) time per stage for nested calls, with a
+    separate call stack per thread
+    """
+
+    def __init__(self):
+        self.totals = {stage: 0.0 for stage in STAGES}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def wrap(self, stage, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self._enter(stage)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exit()
+        return wrapper
+
+    def _enter(self, stage):
+        now = time.perf_counter()
+        stack = self._stack
+        if stack:
+            parent, started = stack[-1]
+            self._add(parent, now - started)
+        stack.append((stage, now))
+
+    def _exit(self):
+        now = time.perf_counter()
+        stack = self._stack
+        stage, started = stack.pop()
+        self._add(stage, now - started)
+        if stack:
+            parent, _ = stack[-1]
+            stack[-1] = (parent, now)
+
+    def _add(self, stage, seconds):
+        with self._lock:
+            self.totals[stage] += seconds
+
+    def reset(self):
+        with self._lock:
+            self.totals = {stage: 0.0 for stage in STAGES}
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def instrument(app, clock):
+    """
+    Route the app's hot-path functions through the stage clock
+    """
+    app.http_get = clock.wrap('fetch', app.http_get)
+    app.BeautifulSoup = clock.wrap('parse', app.BeautifulSoup)
+    app.analyze_sentiment = clock.wrap('score', app.analyze_sentiment)
+    app.get_news_from_multiple_sources = clock.wrap('aggregate', app.get_news_from_multiple_sources)
+    app.search_youtube_videos = clock.wrap('aggregate', app.search_youtube_videos)
+    app.run_analysis = clock.wrap('aggregate', app.run_analysis)
+    for name in ['display_sentiment_comparison', 'display_engagement_metrics',
+                 'display_articles_with_sentiment', 'display_youtube_videos']:
+        setattr(app, name, clock.wrap('render', getattr(app, name)))
+
+
+def run_pipeline(app, celebrity_name, max_items):
+    """
+    The fetch/score/render sequence main() runs for one search
+    """
+    news_articles, youtube_videos, _ = app.run_analysis(
+        celebrity_name, ["News Articles", "YouTube Videos"], 3, max_items
+    )
+    app.display_sentiment_comparison(news_articles, youtube_videos)
+    app.display_engagement_metrics(youtube_videos)
+    app.display_articles_with_sentiment(news_articles, "All")
+    app.display_youtube_videos(youtube_videos, "All")
+    return news_articles, youtube_videos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default='fixtures')
+    parser.add_argument('--name', action='append', dest='names', help='celebrity name (repeatable)')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--max-items', type=int, default=15)
+    parser.add_argument('--latency', type=float, default=0.0, help='injected upstream latency, in seconds')
+    parser.add_argument('--cold', action='store_true', help='clear the shared video store before every run')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random upstream delay, in seconds')
+    args = parser.parse_args()
+    names = args.names or ['Taylor Swift']
+
+    if not os.path.isdir(args.fixtures):
+        sys.exit(f"No fixtures in {args.fixtures!r}; record some with: python replay.py record NAME")
+
+    server = ReplayServer(args.fixtures, latency=args.latency, jitter=args.jitter).start()
+    # The app reads its endpoints at import time
+    os.environ['YOUTUBE_API_URL'] = f"{server.url}/youtube/v3"
+    os.environ['GOOGLE_NEWS_URL'] = server.url
+    os.environ.setdefault('YOUTUBE_API_KEY', 'replay')
+    os.environ.pop('RECORD_DIR', None)
+    # Thumbnails live on YouTube's image CDN, which has no fixtures
+    os.environ['THUMBNAIL_CACHE_MB'] = '0'
+
+    import app
+    from streamlit.logger import set_log_level
+    # Rendering outside `streamlit run` warns about a missing ScriptRunContext on every call
+    set_log_level('error')
+
+    # Replay shares one local host for both APIs; measure the pipeline, not the production rate limits
+    guard = app.get_upstream_guard()
+    guard.limits, guard.default_limit = {}, (1e6, 1e6)
+
+    clock = StageClock()
+    instrument(app, clock)
+
+    for _ in range(args.warmup):
+        for name in names:
+            run_pipeline(app, name, args.max_items)
+
+    stage_samples = {stage: [] for stage in STAGES}
+    end_to_end = []
+    for _ in range(args.runs):
+        for name in names:
+            if args.cold:
+                app.get_video_store().clear()
+            clock.reset()
+            started = time.perf_counter()
+            run_pipeline(app, name, args.max_items)
+            end_to_end.append(time.perf_counter() - started)
+            for stage in STAGES:
+                stage_samples[stage].append(clock.totals[stage])
+
+    server.stop()
+
+    print(f"{len(end_to_end)} runs over {len(names)} name(s), injected latency {args.latency * 1000:.0f}ms"
+          f" (+{args.jitter * 1000:.0f}ms jitter)")
+    print(f"{'stage':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for stage in STAGES:
+        samples = stage_samples[stage]
+        print(f"{stage:<12}{statistics.mean(samples) * 1000:>10.1f}"
+              f"{percentile(samples, 50) * 1000:>10.1f}{percentile(samples, 95) * 1000:>10.1f}")
+    print(f"{'end-to-end':<12}{statistics.mean(end_to_end) * 1000:>10.1f}"
+          f"{percentile(end_to_end, 50) * 1000:>10.1f}{percentile(end_to_end, 95) * 1000:>10.1f}")
+    if server.misses:
+        print(f"warning: {len(server.misses)} request(s) had no recorded fixture")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Streaming export of analysis results to CSV, JSON Lines and Parquet.
+
+Rows are generated lazily from the result data and written in chunks to a
+temporary file on disk, so an export only costs anything when a user
+actually downloads it, and is only held in memory once it is complete.
+"""
+import csv
+import io
+import json
+import tempfile
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+COLUMNS = [
+    'type', 'title', 'source', 'channel', 'date', 'published_at',
+    'views', 'likes', 'comments', 'sentiment', 'sentiment_score', 'link',
+    'comment_rank', 'comment_text', 'comment_sentiment', 'comment_score',
+]
+
+# Rows written per chunk / Parquet row group
+CHUNK_ROWS = 1000
+
+FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'JSON Lines': ('jsonl', 'application/x-ndjson'),
+}
+if pq is not None:
+    FORMATS['Parquet'] = ('parquet', 'application/vnd.apache.parquet')
+
+
+def iter_rows(news_articles, youtube_videos, load_comments=None, analyze=None):
+    """
+    Yield one row per article and video, plus one per comment when
+    `load_comments` (video ID -> list of comments) is given
+    """
+    for article in news_articles:
+        yield {
+            'type': 'news',
+            'title': article['title'],
+            'source': article['source'],
+            'date': article['date'],
+            'sentiment': article['sentiment'],
+            'sentiment_score': article['sentiment_score'],
+            'link': article['link']
+        }
+
+    for video in youtube_videos:
+        video_row = {
+            'type': 'youtube',
+            'title': video['title'],
+            'channel': video['channel_title'],
+            'published_at': video['published_at'],
+            'views': video['view_count'],
+            'likes': video['like_count'],
+            'comments': video['comment_count'],
+            'sentiment': video['combined_sentiment'],
+            'sentiment_score': video['combined_score'],
+            'link': f"https://www.youtube.com/watch?v={video['id']}"
+        }
+        yield video_row
+
+        if load_comments is None:
+            continue
+        for rank, comment in enumerate(load_comments(video['id']), 1):
+            row = dict(video_row, type='youtube_comment', comment_rank=rank, comment_text=comment)
+            if analyze is not None:
+                row['comment_sentiment'], row['comment_score'], _ = analyze(comment)
+            yield row
+
+
+def _chunks(rows, size=CHUNK_ROWS):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv(rows):
+    """
+    Yield CSV text chunks, header first
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    for chunk in _chunks(rows):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_jsonl(rows):
+    """
+    Yield JSON Lines text chunks
+    """
+    for chunk in _chunks(rows):
+        yield ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in chunk)
+
+
+def _parquet_schema():
+    return pa.schema([
+        ('type', pa.string()), ('title', pa.string()), ('source', pa.string()),
+        ('channel', pa.string()), ('date', pa.string()), ('published_at', pa.string()),
+        ('views', pa.int64()), ('likes', pa.int64()), ('comments', pa.int64()),
+        ('sentiment', pa.dictionary(pa.int8(), pa.string())), ('sentiment_score', pa.float64()),
+        ('link', pa.string()), ('comment_rank', pa.int32()), ('comment_text', pa.string()),
+        ('comment_sentiment', pa.dictionary(pa.int8(), pa.string())), ('comment_score', pa.float64()),
+    ])
+
+
+def write_parquet(rows, fileobj):
+    """
+    Write rows to Parquet, one row group per chunk
+    """
+    schema = _parquet_schema()
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        for chunk in _chunks(rows):
+            columns = {name: [row.get(name) for row in chunk] for name in COLUMNS}
+            writer.write_table(pa.table(columns, schema=schema))
+
+
+def export_bytes(rows, export_format):
+    """
+    Contents of an export, streamed in the given format through a temporary
+    file on disk rather than built up in memory
+    """
+    extension, _ = FORMATS[export_format]
+    with tempfile.TemporaryFile() as fileobj:
+        if extension == 'parquet':
+            write_parquet(rows, fileobj)
+        else:
+            chunks = iter_csv(rows) if extension == 'csv' else iter_jsonl(rows)
+            for chunk in chunks:
+                fileobj.write(chunk.encode('utf-8'))
+        fileobj.seek(0)
+        return fileobj.read()
@@ -0,0 +1,226 @@
+"""
+Lightweight timing spans for the search/score/render hot path.
+
+Enable with METRICS_ENABLED=1. Durations are aggregated into per-stage
+histograms and exported in the Prometheus text format, either to the file
+named by METRICS_FILE or over HTTP on METRICS_PORT (path /metrics, bound
+to METRICS_HOST, 127.0.0.1 by default).
+When disabled, `timed` returns the function untouched and `span` returns a
+shared no-op context manager.
+"""
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+METRICS_FILE = os.getenv("METRICS_FILE")
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+METRIC_NAME = "celebrity_stage_duration_seconds"
+
+# Upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_histograms = {}
+_http_server = None
+_http_server_error = None
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of span durations for one stage
+    """
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-th quantile
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(BUCKETS, self.bucket_counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+def observe(stage, seconds):
+    """
+    Record one duration for a stage
+    """
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+
+def span(stage):
+    """
+    Context manager timing the enclosed block under `stage`
+    """
+    if not ENABLED:
+        return _NOOP
+    return _Span(stage)
+
+
+def timed(stage):
+    """
+    Decorator timing every call of the wrapped function under `stage`
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """
+    Summary rows per stage, slowest total first
+    """
+    with _lock:
+        rows = [
+            {
+                "stage": stage,
+                "count": h.count,
+                "total_ms": h.total * 1000,
+                "mean_ms": h.total / h.count * 1000 if h.count else 0.0,
+                "p50_ms": h.quantile(0.5) * 1000,
+                "p95_ms": h.quantile(0.95) * 1000,
+                "max_ms": h.max * 1000,
+            }
+            for stage, h in _histograms.items()
+        ]
+    return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def render_prometheus():
+    """
+    All histograms in the Prometheus text exposition format
+    """
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent in each search, scoring and render stage.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    with _lock:
+        for stage, h in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, h.bucket_counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {h.total}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {h.count}')
+    return "\n".join(lines) + "\n"
+
+
+def export():
+    """
+    Push current histograms to the configured exporters
+    """
+    if not ENABLED:
+        return
+    if METRICS_FILE:
+        tmp_path = METRICS_FILE + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(render_prometheus())
+        os.replace(tmp_path, METRICS_FILE)
+    if METRICS_PORT:
+        start_http_server(int(METRICS_PORT), METRICS_HOST)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        payload = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """
+    Serve /metrics on a background thread; only the first call starts it.
+
+    If the port can't be bound (e.g. another process already serves it),
+    the failure is logged once and the exporter stays off.
+    """
+    global _http_server, _http_server_error
+    with _lock:
+        if _http_server is not None or _http_server_error is not None:
+            return
+        try:
+            _http_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            _http_server_error = e
+            logger.warning("Metrics server not started on %s:%s: %s", host, port, e)
+            return
+        _http_server.daemon_threads = True
+    threading.Thread(target=_http_server.serve_forever, daemon=True).start()
+
+
+def http_server_error():
+    """
+    Why the /metrics server couldn't start, or None
+    """
+    return _http_server_error
@@ -0,0 +1,200 @@
+"""
+Record/replay fixtures for the Google News RSS and YouTube Data API calls.
+
+Recording:
+    python replay.py record "Taylor Swift" --fixtures fixtures
+
+    (or run the app with RECORD_DIR=fixtures to capture whatever it fetches)
+
+Replaying through a local stand-in server:
+    python replay.py serve --fixtures fixtures --port 8765 --latency 0.15
+    YOUTUBE_API_URL=http://127.0.0.1:8765/youtube/v3 \\
+    GOOGLE_NEWS_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# Query parameters that must never end up on disk or in a fixture key
+SECRET_PARAMS = {'key'}
+
+# Google News queries embed the date window, which changes daily
+DATE_FILTER_PATTERN = re.compile(r'\b(after|before):\d{4}-\d{2}-\d{2}')
+
+
+def normalize_params(query_string):
+    """
+    Turn a raw query string into a sorted, secret-free list of pairs
+    """
+    params = []
+    for name, value in parse_qsl(query_string, keep_blank_values=True):
+        if name in SECRET_PARAMS:
+            continue
+        if name == 'q':
+            value = DATE_FILTER_PATTERN.sub(r'\1:*', value)
+        params.append((name, value))
+    return sorted(params)
+
+
+def fixture_key(path, query_string):
+    """
+    Stable fixture file name for a request path and query string
+    """
+    canonical = json.dumps([path, normalize_params(query_string)])
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest() + '.json'
+
+
+def record_response(fixtures_dir, response):
+    """
+    Save a requests.Response as a fixture
+    """
+    parts = urlsplit(response.url)
+    os.makedirs(fixtures_dir, exist_ok=True)
+    fixture = {
+        'path': parts.path,
+        'params': normalize_params(parts.query),
+        'status': response.status_code,
+        'content_type': response.headers.get('Content-Type', 'application/octet-stream'),
+        'body': response.content.decode('utf-8', errors='replace'),
+    }
+    path = os.path.join(fixtures_dir, fixture_key(parts.path, parts.query))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(fixture, f, ensure_ascii=False)
+
+
+def load_fixture(fixtures_dir, path, query_string):
+    """
+    Load the fixture for a request, or None if it was never recorded
+    """
+    fixture_path = os.path.join(fixtures_dir, fixture_key(path, query_string))
+    try:
+        with open(fixture_path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class ReplayServer:
+    """
+    Local stand-in for news.google.com and the YouTube Data API.
+
+    Every response is delayed by `latency` seconds plus up to `jitter`
+    seconds of uniform noise, to approximate upstream round trips.
+    """
+
+    def __init__(self, fixtures_dir, host='127.0.0.1', port=0, latency=0.0, jitter=0.0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.misses = []
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                delay = replay.latency + random.uniform(0, replay.jitter)
+                if delay > 0:
+                    time.sleep(delay)
+
+                fixture = load_fixture(replay.fixtures_dir, parts.path, parts.query)
+                if fixture is None:
+                    replay.misses.append(self.path)
+                    status = 404
+                    content_type = 'application/json'
+                    body = json.dumps({'error': {'code': 404, 'message': 'No fixture recorded'}})
+                else:
+                    status = fixture['status']
+                    content_type = fixture['content_type']
+                    body = fixture['body']
+
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+
+def record(names, fixtures_dir, max_items=15):
+    """
+    Run the analysis pipeline against the live APIs and capture every response
+    """
+    os.environ['RECORD_DIR'] = fixtures_dir
+    import app
+
+    for name in names:
+        # Record every name cold: with a warm video store, later names would only
+        # request the IDs they don't share, and replaying a single name would miss
+        app.get_video_store().clear()
+        news_articles = app.get_news_from_multiple_sources(name)
+        youtube_videos = app.search_youtube_videos(name, max_items)
+        print(f"{name}: {len(news_articles)} articles, {len(youtube_videos)} videos recorded")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='capture live responses to disk')
+    record_parser.add_argument('names', nargs='+', help='celebrity names to search for')
+    record_parser.add_argument('--fixtures', default='fixtures')
+    record_parser.add_argument('--max-items', type=int, default=15)
+
+    serve_parser = subparsers.add_parser('serve', help='serve recorded responses locally')
+    serve_parser.add_argument('--fixtures', default='fixtures')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    serve_parser.add_argument('--jitter', type=float, default=0.0, help='extra random delay, in seconds')
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record(args.names, args.fixtures, args.max_items)
+    else:
+        server = ReplayServer(args.fixtures, args.host, args.port, args.latency, args.jitter)
+        print(f"Replaying {args.fixtures} on {server.url}")
+        print(f"  YOUTUBE_API_URL={server.url}/youtube/v3")
+        print(f"  GOOGLE_NEWS_URL={server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""
+Per-host rate limiting and circuit breaking for upstream APIs.
+
+Each host gets an adaptive token bucket, which halves its rate when the
+upstream throttles us (429, or a YouTube quota 403) and creeps back up on
+success, and a circuit breaker, which fails fast after repeated failures
+and lets a single probe through once its cool-down has passed. The last
+good response per request is kept so callers can be served stale data
+while a host is unhealthy.
+"""
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode, urlsplit
+
+# YouTube Data API error reasons that mean "slow down", as opposed to e.g. commentsDisabled
+QUOTA_REASONS = {'quotaExceeded', 'rateLimitExceeded', 'userRateLimitExceeded', 'dailyLimitExceeded'}
+
+
+class UpstreamUnavailable(Exception):
+    """
+    Raised instead of calling a host that is throttled or whose circuit is open
+    """
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket whose refill rate backs off multiplicatively when throttled
+    and recovers additively on success
+    """
+
+    def __init__(self, rate, burst, min_rate=None):
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 20
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout):
+        """
+        Take a token, waiting up to `timeout` seconds; False if none came free
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def throttled(self, retry_after=None):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; open ->
+    half-open after `reset_timeout` seconds, admitting one probe request
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """
+        Give back an admitted call that never reached the upstream, so a
+        half-open circuit can let another probe through
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def retry_in(self):
+        """
+        Seconds until an open circuit lets a probe through
+        """
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+class HostGuard:
+    """
+    Rate limiter, circuit breaker and last-good responses for one host
+    """
+
+    def __init__(self, rate, burst, failure_threshold=5, reset_timeout=30, max_stale=128):
+        self.bucket = AdaptiveTokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_stale = max_stale
+        self._stale = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, key, response):
+        with self._lock:
+            self._stale[key] = response
+            self._stale.move_to_end(key)
+            while len(self._stale) > self.max_stale:
+                self._stale.popitem(last=False)
+
+    def stale(self, key):
+        with self._lock:
+            return self._stale.get(key)
+
+    def status(self):
+        if self.breaker.state == CircuitBreaker.OPEN:
+            return 'open'
+        if self.breaker.state == CircuitBreaker.HALF_OPEN:
+            return 'recovering'
+        if self.bucket.rate < self.bucket.max_rate:
+            return 'throttled'
+        return 'healthy'
+
+
+def is_throttled(response):
+    """
+    Whether a response means the upstream wants us to back off
+    """
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    try:
+        errors = response.json()['error']['errors']
+    except Exception:
+        # A bare 403 (e.g. from news.google.com) is a block, not a per-resource error
+        return True
+    return any(error.get('reason') in QUOTA_REASONS for error in errors)
+
+
+def retry_after_seconds(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamGuard:
+    """
+    Per-host guards, created on first use from `limits` ({host: (rate, burst)})
+    """
+
+    def __init__(self, limits, default_limit=(5, 10), max_wait=5, failure_threshold=5, reset_timeout=30):
+        self.limits = limits
+        self.default_limit = default_limit
+        self.max_wait = max_wait
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def for_host(self, host):
+        with self._lock:
+            guard = self._hosts.get(host)
+            if guard is None:
+                rate, burst = self.limits.get(host, self.default_limit)
+                guard = self._hosts[host] = HostGuard(rate, burst, self.failure_threshold, self.reset_timeout)
+            return guard
+
+    def is_healthy(self, url):
+        return self.for_host(urlsplit(url).netloc).status() == 'healthy'
+
+    def get(self, fetch, url, params=None, **kwargs):
+        """
+        Call `fetch(url, params=..., **kwargs)` through the host's guard.
+
+        Serves the last good response for the same request when the host is
+        unavailable, throttled or failing, and raises UpstreamUnavailable if
+        there is none.
+        """
+        parts = urlsplit(url)
+        guard = self.for_host(parts.netloc)
+        public_params = sorted((k, v) for k, v in (params or {}).items() if k != 'key')
+        key = (parts.path, parts.query, urlencode(public_params))
+
+        if not guard.breaker.allow():
+            return self._stale_or_raise(guard, key, f"{parts.netloc} circuit open")
+
+        # This call may be the half-open probe: if it never gets an answer to
+        # record, hand it back, or the circuit would stay half-open forever
+        settled = False
+        try:
+            if not guard.bucket.acquire(self.max_wait):
+                return self._stale_or_raise(guard, key, f"{parts.netloc} rate limited")
+            try:
+                response = fetch(url, params=params, **kwargs)
+            except Exception:
+                guard.breaker.record_failure()
+                settled = True
+                stale = guard.stale(key)
+                if stale is not None:
+                    return stale
+                raise
+            settled = True
+        finally:
+            if not settled:
+                guard.breaker.release()
+
+        if is_throttled(response):
+            guard.bucket.throttled(retry_after_seconds(response))
+            guard.breaker.record_failure()
+        elif response.status_code >= 500:
+            guard.breaker.record_failure()
+        else:
+            guard.bucket.succeeded()
+            guard.breaker.record_success()
+            if response.status_code == 200:
+                guard.remember(key, response)
+            return response
+
+        stale = guard.stale(key)
+        return stale if stale is not None else response
+
+    def _stale_or_raise(self, guard, key, reason):
+        stale = guard.stale(key)
+        if stale is not None:
+            return stale
+        raise UpstreamUnavailable(reason)
+
+    def status(self):
+        """
+        {host: (status, current rate per second, seconds until retry)}
+        """
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {
+            host: (guard.status(), guard.bucket.rate, guard.breaker.retry_in())
+            for host, guard in hosts.items()
+        }
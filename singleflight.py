@@ -0,0 +1,73 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one in-flight call and all
+receive its result. Nothing is cached once the call completes.
+"""
+import threading
+import time
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls by key.
+
+    If the leading call raises, its error goes only to the leader; waiters
+    retry once, with one of them as the new leader, and share whatever that
+    call raises. A waiter that gives up after `timeout` seconds in total runs
+    the call itself instead of failing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        retried = False
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                else:
+                    self.coalesced += 1
+
+            if leader:
+                try:
+                    call.result = fn()
+                    return call.result
+                except BaseException as e:
+                    call.error = e
+                    raise
+                finally:
+                    with self._lock:
+                        if self._calls.get(key) is call:
+                            del self._calls[key]
+                    call.done.set()
+
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not call.done.wait(remaining):
+                # The leader is stuck on a slow upstream; don't block behind it
+                return fn()
+            if call.error is None:
+                return call.result
+            if retried:
+                # The upstream is still failing; don't queue behind yet another leader
+                raise call.error
+            retried = True
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,82 @@
+"""
+In-memory store of YouTube video data shared across searches and sessions.
+
+Entries are keyed by video ID. Each field (details, comments, scores) carries
+its own expiry, so overlapping searches only refetch what is missing or
+stale. Scores are derived from details and comments and are dropped whenever
+either of those is replaced.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class VideoStore:
+    """
+    Thread-safe, size-bounded LRU of per-video fields with per-field expiry
+    """
+
+    DETAILS = "details"
+    COMMENTS = "comments"
+    SCORES = "scores"
+
+    # Fields whose replacement invalidates the derived scores
+    SCORE_INPUTS = (DETAILS, COMMENTS)
+
+    def __init__(self, max_videos=5000):
+        self.max_videos = max_videos
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def put(self, video_id, field, value, ttl=None):
+        """
+        Store a field; `ttl` of None means it never goes stale
+        """
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is None:
+                entry = self._entries[video_id] = {}
+            else:
+                self._entries.move_to_end(video_id)
+            entry[field] = (value, expires_at)
+            if field in self.SCORE_INPUTS:
+                entry.pop(self.SCORES, None)
+            while len(self._entries) > self.max_videos:
+                self._entries.popitem(last=False)
+
+    def get(self, video_id, field):
+        """
+        Latest value of a field, fresh or stale, or None if never stored
+        """
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is None or field not in entry:
+                return None
+            self._entries.move_to_end(video_id)
+            return entry[field][0]
+
+    def stale_ids(self, video_ids, field):
+        """
+        IDs whose field is missing or expired, in the order given
+        """
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            for video_id in video_ids:
+                entry = self._entries.get(video_id)
+                if entry is None or field not in entry:
+                    stale.append(video_id)
+                    continue
+                expires_at = entry[field][1]
+                if expires_at is not None and expires_at <= now:
+                    stale.append(video_id)
+        return stale
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+
+import pytest
+
+import export
+
+
+def article(i):
+    return {
+        "title": f"Article {i}",
+        "source": "Example News",
+        "date": "2024-01-01",
+        "sentiment": "Positive",
+        "sentiment_score": 0.5,
+        "link": f"https://example.com/{i}",
+    }
+
+
+def video(i):
+    return {
+        "id": f"vid{i}",
+        "title": f"Video {i}",
+        "channel_title": "Channel",
+        "published_at": "2024-01-01T00:00:00Z",
+        "view_count": 100 * i,
+        "like_count": 10 * i,
+        "comment_count": 2,
+        "combined_sentiment": "Neutral",
+        "combined_score": 0.0,
+    }
+
+
+def load_comments(video_id):
+    return [f"{video_id} first", f"{video_id} second"]
+
+
+def analyze(text):
+    return "Negative", -0.25, None
+
+
+def parse(data, export_format):
+    if export_format == "CSV":
+        return list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+    if export_format == "JSON Lines":
+        return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+    pq = pytest.importorskip("pyarrow.parquet")
+    return pq.read_table(io.BytesIO(data)).to_pylist()
+
+
+def test_rows_without_comments():
+    rows = list(export.iter_rows([article(1)], [video(1), video(2)]))
+
+    assert [row["type"] for row in rows] == ["news", "youtube", "youtube"]
+    assert rows[1]["link"] == "https://www.youtube.com/watch?v=vid1"
+    assert "comment_text" not in rows[1]
+
+
+def test_rows_with_comments():
+    rows = list(export.iter_rows([], [video(1)], load_comments, analyze))
+
+    assert [row["type"] for row in rows] == ["youtube", "youtube_comment", "youtube_comment"]
+    assert [row["comment_rank"] for row in rows[1:]] == [1, 2]
+    assert rows[2]["comment_text"] == "vid1 second"
+    assert rows[2]["comment_sentiment"] == "Negative"
+    # Comment rows repeat their video's columns
+    assert rows[2]["title"] == "Video 1"
+
+
+@pytest.mark.parametrize("export_format", ["CSV", "JSON Lines", "Parquet"])
+@pytest.mark.parametrize("with_comments", [False, True])
+def test_export_round_trips(export_format, with_comments):
+    if export_format not in export.FORMATS:
+        pytest.skip("pyarrow is not installed")
+    news = [article(i) for i in range(export.CHUNK_ROWS + 5)]
+    videos = [video(i) for i in range(3)]
+    rows = export.iter_rows(news, videos, load_comments if with_comments else None, analyze)
+
+    parsed = parse(export.export_bytes(rows, export_format), export_format)
+
+    expected = len(news) + len(videos) * (3 if with_comments else 1)
+    assert len(parsed) == expected
+    assert parsed[0]["title"] == "Article 0"
+    assert parsed[export.CHUNK_ROWS]["title"] == f"Article {export.CHUNK_ROWS}"
+    assert parsed[len(news)]["type"] == "youtube"
+    if with_comments:
+        assert parsed[-1]["type"] == "youtube_comment"
+        assert parsed[-1]["comment_text"] == "vid2 second"
+
+
+def test_csv_header_is_written_once():
+    rows = export.iter_rows([article(i) for i in range(export.CHUNK_ROWS * 2)], [])
+
+    lines = export.export_bytes(rows, "CSV").decode("utf-8").splitlines()
+
+    assert lines[0].startswith("type,title,")
+    assert sum(line.startswith("type,") for line in lines) == 1
+    assert len(lines) == export.CHUNK_ROWS * 2 + 1
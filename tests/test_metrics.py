@@ -0,0 +1,32 @@
+import socket
+
+import metrics
+
+
+def test_port_in_use_is_reported_once_and_not_retried(monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "_http_server", None)
+    monkeypatch.setattr(metrics, "_http_server_error", None)
+
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+
+        metrics.start_http_server(port)
+        metrics.start_http_server(port)
+
+    assert isinstance(metrics.http_server_error(), OSError)
+    assert metrics._http_server is None
+    assert len([r for r in caplog.records if r.name == "metrics"]) == 1
+
+
+def test_prometheus_histogram_is_cumulative(monkeypatch):
+    monkeypatch.setattr(metrics, "_histograms", {})
+    metrics.observe("fetch", 0.003)
+    metrics.observe("fetch", 0.3)
+
+    text = metrics.render_prometheus()
+
+    assert 'celebrity_stage_duration_seconds_bucket{stage="fetch",le="0.005"} 1' in text
+    assert 'celebrity_stage_duration_seconds_bucket{stage="fetch",le="+Inf"} 2' in text
+    assert 'celebrity_stage_duration_seconds_count{stage="fetch"} 2' in text
@@ -0,0 +1,46 @@
+import pytest
+
+import app
+
+
+def details(views, likes=0, comments=0):
+    return {"view_count": views, "like_count": likes, "comment_count": comments}
+
+
+def test_fusion_rewards_videos_found_by_several_variants():
+    relevance = app.fuse_rankings([["a", "b", "c"], ["b", "d"]])
+
+    assert list(relevance) == ["a", "b", "c", "d"]
+    assert relevance["b"] > relevance["a"] > relevance["c"]
+    assert relevance["a"] == pytest.approx(1 / (app.RANK_FUSION_K + 1))
+    assert relevance["b"] == pytest.approx(1 / (app.RANK_FUSION_K + 2) + 1 / (app.RANK_FUSION_K + 1))
+    # Same rank in one list scores the same
+    assert relevance["d"] == pytest.approx(relevance["b"] - 1 / (app.RANK_FUSION_K + 1))
+
+
+def test_fusion_of_nothing_is_empty():
+    assert app.fuse_rankings([]) == {}
+    assert app.fuse_rankings([[], []]) == {}
+
+
+def test_rank_scores_are_weighted_and_normalised():
+    relevance = {"a": 0.2, "b": 0.1}
+    scores = app.rank_videos(relevance, {"a": details(0), "b": details(1000, 100, 10)})
+
+    # Top relevance and top engagement each get their full weight
+    assert scores["a"] == pytest.approx(app.RELEVANCE_WEIGHT)
+    assert scores["b"] == pytest.approx(app.RELEVANCE_WEIGHT * 0.5 + app.ENGAGEMENT_WEIGHT)
+
+
+def test_engagement_breaks_relevance_ties():
+    relevance = {"a": 0.1, "b": 0.1}
+    scores = app.rank_videos(relevance, {"a": details(10), "b": details(10_000)})
+
+    assert scores["b"] > scores["a"]
+
+
+def test_rank_only_covers_videos_with_details():
+    scores = app.rank_videos({"a": 0.1, "gone": 0.5}, {"a": details(0)})
+
+    assert scores == {"a": pytest.approx(app.RELEVANCE_WEIGHT)}
+    assert app.rank_videos({}, {}) == {}
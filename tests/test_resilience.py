@@ -0,0 +1,132 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from resilience import AdaptiveTokenBucket, CircuitBreaker, UpstreamGuard, UpstreamUnavailable
+
+
+def response(status_code=200, headers=None):
+    return SimpleNamespace(status_code=status_code, headers=headers or {}, json=lambda: {})
+
+
+def test_circuit_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in() > 0
+
+
+def test_released_probe_lets_the_next_one_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_probe_refused_a_token_is_released():
+    guard = UpstreamGuard({}, max_wait=0.01, failure_threshold=1, reset_timeout=0.05)
+    host = guard.for_host("api.example.com")
+    host.breaker.record_failure()
+    host.bucket.tokens = 0
+    host.bucket.rate = 1
+    time.sleep(0.06)
+
+    with pytest.raises(UpstreamUnavailable):
+        guard.get(lambda url, **kwargs: response(), "https://api.example.com/search")
+    assert host.breaker.state == CircuitBreaker.HALF_OPEN
+
+    host.bucket.tokens = host.bucket.burst
+    assert guard.get(lambda url, **kwargs: response(), "https://api.example.com/search").status_code == 200
+    assert host.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_probe_interrupted_mid_fetch_is_released():
+    guard = UpstreamGuard({}, failure_threshold=1, reset_timeout=0.05)
+    host = guard.for_host("api.example.com")
+    host.breaker.record_failure()
+    time.sleep(0.06)
+
+    def interrupted(url, **kwargs):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        guard.get(interrupted, "https://api.example.com/search")
+    assert host.breaker.allow()
+
+
+def test_open_circuit_serves_the_last_good_response():
+    guard = UpstreamGuard({}, failure_threshold=1, reset_timeout=30)
+    good = response()
+    assert guard.get(lambda url, **kwargs: good, "https://api.example.com/search", params={"q": "a"}) is good
+    assert guard.get(lambda url, **kwargs: response(503), "https://api.example.com/search", params={"q": "a"}) is good
+
+    def unreachable(url, **kwargs):
+        raise AssertionError("circuit should be open")
+
+    assert guard.get(unreachable, "https://api.example.com/search", params={"q": "a"}) is good
+    with pytest.raises(UpstreamUnavailable):
+        guard.get(unreachable, "https://api.example.com/search", params={"q": "b"})
+
+
+def test_retry_after_blocks_the_bucket():
+    bucket = AdaptiveTokenBucket(rate=100, burst=5)
+    bucket.throttled(retry_after=0.2)
+
+    assert bucket.rate == 50
+    assert not bucket.acquire(timeout=0.05)
+    started = time.monotonic()
+    assert bucket.acquire(timeout=1)
+    assert time.monotonic() - started >= 0.1
+
+
+def test_throttled_response_honours_retry_after():
+    guard = UpstreamGuard({}, max_wait=0.05)
+    throttled = response(429, {"Retry-After": "10"})
+
+    assert guard.get(lambda url, **kwargs: throttled, "https://api.example.com/search") is throttled
+    with pytest.raises(UpstreamUnavailable):
+        guard.get(lambda url, **kwargs: response(), "https://api.example.com/search")
+
+
+def test_rate_recovers_on_success():
+    bucket = AdaptiveTokenBucket(rate=10, burst=1, min_rate=1)
+    for _ in range(10):
+        bucket.throttled()
+    assert bucket.rate == 1
+
+    bucket.succeeded()
+    assert bucket.rate == 2
+    for _ in range(20):
+        bucket.succeeded()
+    assert bucket.rate == 10
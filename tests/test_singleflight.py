@@ -0,0 +1,150 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return 42
+
+    results = run_concurrently(5, lambda: flight.do("key", fetch))
+
+    assert results == [42] * 5
+    assert len(calls) == 1
+    assert flight.coalesced == 4
+    assert flight.in_flight() == 0
+
+
+def test_leader_failure_is_not_shared_with_waiters():
+    flight = SingleFlight()
+    calls = []
+    lock = threading.Lock()
+
+    def fetch():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        time.sleep(0.1)
+        if first:
+            raise RuntimeError("upstream down")
+        return "ok"
+
+    results = run_concurrently(4, lambda: flight.do("key", fetch))
+
+    errors = [r for r in results if isinstance(r, RuntimeError)]
+    assert len(errors) == 1
+    assert results.count("ok") == 3
+    # The failed leader's waiters retry under a single new leader
+    assert len(calls) == 2
+
+
+def test_waiter_runs_its_own_call_after_timeout():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def stuck():
+        release.wait(5)
+        return "slow"
+
+    leader = threading.Thread(target=lambda: flight.do("key", stuck))
+    leader.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    assert flight.do("key", lambda: "own", timeout=0.1) == "own"
+    assert time.monotonic() - started < 1
+
+    release.set()
+    leader.join(5)
+
+
+def test_error_reaches_the_leader():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.in_flight() == 0
+
+
+def test_waiters_share_the_retry_when_every_leader_fails():
+    flight = SingleFlight()
+    calls = []
+    lock = threading.Lock()
+
+    def fetch():
+        with lock:
+            calls.append(1)
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    started = time.monotonic()
+    results = run_concurrently(5, lambda: flight.do("key", fetch))
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    # One failed leader, then a single shared retry
+    assert len(calls) == 2
+    assert time.monotonic() - started < 0.35
+    assert flight.in_flight() == 0
+
+
+def test_timeout_covers_retries():
+    flight = SingleFlight()
+    calls = []
+    lock = threading.Lock()
+    finished = queue.Queue()
+
+    def fetch():
+        with lock:
+            calls.append(1)
+            attempt = len(calls)
+        if attempt == 1:
+            time.sleep(0.3)
+            raise RuntimeError("upstream down")
+        if attempt == 2:
+            # The retry's leader hangs
+            time.sleep(5)
+        return "ok"
+
+    def lead():
+        with pytest.raises(RuntimeError):
+            flight.do("key", fetch)
+
+    threading.Thread(target=lead, daemon=True).start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    for _ in range(2):
+        threading.Thread(target=lambda: finished.put(flight.do("key", fetch, timeout=0.4)), daemon=True).start()
+
+    # The waiter not leading the retry gives up 0.4s after it started, not 0.4s after the retry began
+    assert finished.get(timeout=2) == "ok"
+    assert time.monotonic() - started < 0.55
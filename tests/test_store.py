@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import pytest
+
+import store
+from store import VideoStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(store, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_stale_ids_follow_each_fields_ttl(clock):
+    videos = VideoStore()
+    videos.put("a", VideoStore.DETAILS, {"title": "A"}, ttl=60)
+    videos.put("a", VideoStore.COMMENTS, ["hi"], ttl=10)
+    videos.put("b", VideoStore.DETAILS, {"title": "B"})
+
+    assert videos.stale_ids(["a", "b", "c"], VideoStore.DETAILS) == ["c"]
+    assert videos.stale_ids(["a", "b"], VideoStore.COMMENTS) == ["b"]
+
+    clock.now += 10
+    assert videos.stale_ids(["a", "b"], VideoStore.COMMENTS) == ["a", "b"]
+    assert videos.stale_ids(["a", "b"], VideoStore.DETAILS) == []
+
+    clock.now += 50
+    # No ttl never goes stale
+    assert videos.stale_ids(["b", "a"], VideoStore.DETAILS) == ["a"]
+    # Stale values are still served
+    assert videos.get("a", VideoStore.COMMENTS) == ["hi"]
+
+
+def test_refreshing_a_field_makes_it_fresh_again(clock):
+    videos = VideoStore()
+    videos.put("a", VideoStore.DETAILS, {"title": "old"}, ttl=5)
+    clock.now += 5
+    assert videos.stale_ids(["a"], VideoStore.DETAILS) == ["a"]
+
+    videos.put("a", VideoStore.DETAILS, {"title": "new"}, ttl=5)
+    assert videos.stale_ids(["a"], VideoStore.DETAILS) == []
+    assert videos.get("a", VideoStore.DETAILS) == {"title": "new"}
+
+
+@pytest.mark.parametrize("field", [VideoStore.DETAILS, VideoStore.COMMENTS])
+def test_replacing_a_score_input_drops_scores(field):
+    videos = VideoStore()
+    videos.put("a", VideoStore.DETAILS, {"title": "A"})
+    videos.put("a", VideoStore.COMMENTS, [])
+    videos.put("a", VideoStore.SCORES, {"combined_score": 0.5})
+
+    videos.put("a", field, "replaced")
+
+    assert videos.get("a", VideoStore.SCORES) is None
+    assert videos.stale_ids(["a"], VideoStore.SCORES) == ["a"]
+
+
+def test_scores_survive_unrelated_puts():
+    videos = VideoStore()
+    videos.put("a", VideoStore.SCORES, {"combined_score": 0.5})
+    videos.put("b", VideoStore.DETAILS, {"title": "B"})
+
+    assert videos.get("a", VideoStore.SCORES) == {"combined_score": 0.5}
+
+
+def test_evicts_least_recently_used_videos():
+    videos = VideoStore(max_videos=3)
+    for video_id in ["a", "b", "c"]:
+        videos.put(video_id, VideoStore.DETAILS, video_id)
+
+    # Reading "a" and writing "b" make "c" the least recently used
+    videos.get("a", VideoStore.DETAILS)
+    videos.put("b", VideoStore.COMMENTS, [])
+    videos.put("d", VideoStore.DETAILS, "d")
+
+    assert len(videos) == 3
+    assert videos.get("c", VideoStore.DETAILS) is None
+    assert [videos.get(v, VideoStore.DETAILS) for v in ["a", "b", "d"]] == ["a", "b", "d"]
+
+    videos.put("e", VideoStore.DETAILS, "e")
+    assert videos.get("a", VideoStore.DETAILS) is None
+
+
+def test_stale_ids_does_not_count_as_a_use():
+    videos = VideoStore(max_videos=2)
+    videos.put("a", VideoStore.DETAILS, "a")
+    videos.put("b", VideoStore.DETAILS, "b")
+
+    videos.stale_ids(["a"], VideoStore.DETAILS)
+    videos.put("c", VideoStore.DETAILS, "c")
+
+    assert videos.get("a", VideoStore.DETAILS) is None
+    assert videos.get("b", VideoStore.DETAILS) == "b"
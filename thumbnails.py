@@ -0,0 +1,158 @@
+"""
+Local fetch-and-cache layer for YouTube thumbnails.
+
+Thumbnails are fetched concurrently, downscaled once to the width the app
+displays them at, and stored on disk under a size bound (least recently used
+files are evicted first), so repeat views cost no upstream traffic. A disk
+that can't be written to only costs the caching: thumbnails are still
+returned, just fetched again next time.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from PIL import Image
+
+
+class ThumbnailCache:
+    """
+    Disk-backed, size-bounded cache of downscaled thumbnails keyed by URL
+    """
+
+    def __init__(self, cache_dir, max_bytes, width=320, max_workers=8, timeout=5):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.width = width
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnails")
+        self._session = requests.Session()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        # path -> (size in bytes, last used)
+        self._index = {}
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if not name.endswith(".jpg") or not os.path.isfile(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            self._index[path] = (stat.st_size, stat.st_mtime)
+        self._total_bytes = sum(size for size, _ in self._index.values())
+
+    def _path(self, url):
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}_{self.width}.jpg")
+
+    def get(self, url):
+        """
+        Downscaled JPEG bytes for a thumbnail URL, or None if it can't be fetched
+        """
+        return self._submit(url).result()
+
+    def get_many(self, urls):
+        """
+        Fetch several thumbnails concurrently; returns {url: bytes or None}
+        """
+        futures = {url: self._submit(url) for url in set(urls) if url}
+        return {url: future.result() for url, future in futures.items()}
+
+    def prefetch(self, urls):
+        """
+        Warm the cache in the background without waiting for the results
+        """
+        for url in set(urls):
+            if url:
+                self._submit(url)
+
+    def _submit(self, url):
+        # Concurrent requests for the same URL share one download
+        with self._lock:
+            future = self._pending.get(url)
+            if future is None:
+                future = self._pending[url] = self._executor.submit(self._load, url)
+                future.add_done_callback(lambda _, url=url: self._forget(url))
+            return future
+
+    def _forget(self, url):
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def _load(self, url):
+        path = self._path(url)
+        data = self._read(path)
+        if data is not None:
+            return data
+
+        try:
+            response = self._session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            image = Image.open(io.BytesIO(response.content)).convert("RGB")
+            image.thumbnail((self.width, self.width))
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=85, optimize=True)
+        except Exception:
+            return None
+
+        data = buffer.getvalue()
+        try:
+            self._write(path, data)
+        except OSError:
+            pass
+        return data
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            if path in self._index:
+                self._index[path] = (self._index[path][0], time.time())
+        return data
+
+    def _write(self, path, data):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            previous = self._index.get(path)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            self._index[path] = (len(data), time.time())
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _evict(self):
+        # Caller holds self._lock
+        if self._total_bytes <= self.max_bytes:
+            return
+        for path, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            del self._index[path]
+            self._total_bytes -= size
+            if self._total_bytes <= self.max_bytes:
+                break
+
+    def __len__(self):
+        with self._lock:
+            return len(self._index)